@@ -4,23 +4,80 @@ import matplotlib.font_manager as fm
 import matplotlib
 import numpy as np
 import sys
+import re
 import traceback
 import logging
-import sqlanydb as db
+import sqlite3
+try:
+    import sqlanydb as db
+except ImportError:
+    # only the sqlanywhere backend needs it
+    db = None
 
 logging.basicConfig(format='%(message)s',
                     level=logging.INFO)
-conn = db.connect(
-    userid="DBA",
-    password="sql",
-    serverName="airbnb",
-    databasename="airbnb",
-    databasefile="/home/tom/src/airbnb/db/airbnb.db",
-)
+
+# "sqlanywhere" or "sqlite", as for airbnb.py -db
+DB_BACKEND = "sqlanywhere"
+DB_SQLITE_FILE = "/home/tom/src/airbnb/db/dbnb.sqlite"
+
+
+def connect():
+    if DB_BACKEND == "sqlite":
+        return sqlite3.connect(DB_SQLITE_FILE)
+    return db.connect(
+        userid="DBA",
+        password="sql",
+        serverName="airbnb",
+        databasename="airbnb",
+        databasefile="/home/tom/src/airbnb/db/airbnb.db",
+    )
+
+conn = connect()
 
 PIECHART_EXPLODE = 0.05
 
 
+def survey_closed(survey_id):
+    """
+    True if the survey has been closed (airbnb.py -cs), so its host and
+    room type aggregates are saved in survey_host_summary and
+    survey_room_type_summary.
+    """
+    c = conn.cursor()
+    try:
+        c.execute("select count(*) from survey_closed where survey_id = ?",
+                  (survey_id,))
+        return c.fetchone()[0] > 0
+    except:
+        # a database from before the summaries
+        conn.rollback()
+        return False
+    finally:
+        c.close()
+
+
+def survey_sql(plotter, survey_id, closed=False):
+    """
+    The (sql, params) of a plot, with @survey_id bound as a parameter. A
+    closed survey is read from its saved aggregates. The sqlite database
+    has survey_room and survey_host views in place of the procedures,
+    selected by survey_id.
+    """
+    sql = plotter.sql
+    if closed:
+        if hasattr(plotter, "summary_sql"):
+            sql = plotter.summary_sql
+        sql = sql.replace(
+            "survey_host(@survey_id)",
+            "(select * from survey_host_summary where survey_id = @survey_id)")
+    if DB_BACKEND == "sqlite":
+        sql = re.sub(r"\b(survey_room|survey_host)\(@survey_id\)",
+                     r"(select * from \1 where survey_id = @survey_id)", sql)
+    params = (survey_id,) * sql.count("@survey_id")
+    return (sql.replace("@survey_id", "?"), params)
+
+
 class byhost:
     sql = """
         select
@@ -151,6 +208,14 @@ class listings_byroomtype:
         group by room_type
         order by room_type
         """
+    summary_sql = """
+        select
+        room_type,
+        listings
+        from survey_room_type_summary
+        where survey_id = @survey_id
+        order by room_type
+        """
     name = "listing"
     names = "listings"
     xlabel = "Room Type"
@@ -168,6 +233,14 @@ class bookings_byroomtype:
         group by room_type
         order by room_type
         """
+    summary_sql = """
+        select
+        room_type,
+        bookings
+        from survey_room_type_summary
+        where survey_id = @survey_id
+        order by room_type
+        """
     name = "booking"
     names = "bookings"
     xlabel = "Room Type"
@@ -185,6 +258,14 @@ class income1_byroomtype:
         group by room_type
         order by room_type
         """
+    summary_sql = """
+        select
+        room_type,
+        income1 income_1
+        from survey_room_type_summary
+        where survey_id = @survey_id
+        order by room_type
+        """
     name = "income"
     names = "income"
     xlabel = "Room Type"
@@ -202,6 +283,14 @@ class income2_byroomtype:
         group by room_type
         order by room_type
         """
+    summary_sql = """
+        select
+        room_type,
+        income2 income_2
+        from survey_room_type_summary
+        where survey_id = @survey_id
+        order by room_type
+        """
     name = "income"
     names = "income"
     xlabel = "Room Type"
@@ -228,12 +317,12 @@ class rating:
     filename = "@survey_description_" + names + "_listings_by_rating.pdf"
 
 
-def piechart(plotter, survey_id, survey_description):
+def piechart(plotter, survey_id, survey_description, closed=False):
     try:
-        sql = plotter.sql.replace('@survey_id', str(survey_id))
+        (sql, params) = survey_sql(plotter, survey_id, closed)
         logging.debug(sql)
         c = conn.cursor()
-        c.execute(sql)
+        c.execute(sql, params)
         result_set = c.fetchall()
         (labels, fractions, ) = ([x for x, y in result_set],
                                  [float(y) for x, y in result_set])
@@ -275,11 +364,11 @@ def piechart(plotter, survey_id, survey_description):
         traceback.print_exc(file=sys.stdout)
 
 
-def plot(plotter, survey_id, survey_description):
+def plot(plotter, survey_id, survey_description, closed=False):
     try:
-        sql = plotter.sql.replace("@survey_id", str(survey_id))
+        (sql, params) = survey_sql(plotter, survey_id, closed)
         c = conn.cursor()
-        c.execute(sql)
+        c.execute(sql, params)
         result_set = c.fetchall()
 
         filename = plotter.filename.replace(
@@ -353,16 +442,17 @@ def main():
         )
     for result in result_set:
         (survey_id, survey_description) = result
-        piechart(byhost, survey_id, survey_description)
-        piechart(byhost_with_reviews, survey_id, survey_description)
-        piechart(bylisting, survey_id, survey_description)
-        piechart(bybooking, survey_id, survey_description)
-        piechart(byincome, survey_id, survey_description)
-        piechart(byincome2, survey_id, survey_description)
-        piechart(listings_byroomtype, survey_id, survey_description)
-        piechart(bookings_byroomtype, survey_id, survey_description)
-        #piechart(income1_byroomtype, survey_id, survey_description)
-        #piechart(income2_byroomtype, survey_id, survey_description)
+        closed = survey_closed(survey_id)
+        piechart(byhost, survey_id, survey_description, closed)
+        piechart(byhost_with_reviews, survey_id, survey_description, closed)
+        piechart(bylisting, survey_id, survey_description, closed)
+        piechart(bybooking, survey_id, survey_description, closed)
+        piechart(byincome, survey_id, survey_description, closed)
+        piechart(byincome2, survey_id, survey_description, closed)
+        piechart(listings_byroomtype, survey_id, survey_description, closed)
+        piechart(bookings_byroomtype, survey_id, survey_description, closed)
+        #piechart(income1_byroomtype, survey_id, survey_description, closed)
+        #piechart(income2_byroomtype, survey_id, survey_description, closed)
         # plot(rating, survey_id)
 
 if __name__ == "__main__":
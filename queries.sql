@@ -72,3 +72,24 @@ select host_id, sum(reviews * price * minstay) revenue_2
 from sfhost
 order by revs desc
 limit 10;
+
+-- Closed surveys (airbnb.py -cs): the same analyses from the saved
+-- aggregates, without reading the room table
+
+-- Breakdown of hosts by number of listings per host, for survey 1
+select multilister, count(*) hosts
+from survey_host_summary
+where survey_id = 1
+group by multilister;
+
+-- Breakdown of listings and bookings by room type, for survey 1
+select room_type, listings, bookings, income1
+from survey_room_type_summary
+where survey_id = 1
+order by room_type;
+
+-- Multilister shares in every closed survey (survey_hosts, for closed
+-- surveys)
+select *
+from closed_survey_hosts
+order by survey;
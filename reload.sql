@@ -49660,6 +49660,94 @@ COMMENT ON TABLE "DBA"."survey_search_page" IS
 	'This table tracks search progress during the first stage of a survey, to avoid going through all the rooms again and again. Once a survey is complete, the rows could be deleted for that survey.'
 go
 
+CREATE TABLE "DBA"."room_fill_queue" (
+    "room_id"                        integer NOT NULL
+   ,"survey_id"                      integer NOT NULL
+   ,"status"                         integer NOT NULL DEFAULT 0
+   ,"lease_owner"                    varchar(255) NULL
+   ,"lease_expires"                  timestamp NULL
+   ,PRIMARY KEY ("room_id" ASC,"survey_id" ASC) 
+)
+go
+
+COMMENT ON TABLE "DBA"."room_fill_queue" IS 
+	'Rooms waiting to be filled by the second stage of a survey. Fill processes lease batches of queued rows (status 0 -> 1) until lease_expires, and mark them done (status 2) once the room has been filled.'
+go
+
+CREATE TABLE "DBA"."page_archive_dictionary" (
+    "dictionary_id"                  integer NOT NULL DEFAULT autoincrement
+   ,"page_type"                      varchar(20) NOT NULL
+   ,"zdict"                          long binary NOT NULL
+   ,"created"                        timestamp NOT NULL DEFAULT current timestamp
+   ,PRIMARY KEY ("dictionary_id" ASC) 
+)
+go
+
+COMMENT ON TABLE "DBA"."page_archive_dictionary" IS 
+	'zlib preset dictionaries for the archived pages of each page_type (room or search), built from the first pages archived.'
+go
+
+CREATE TABLE "DBA"."room_page_archive" (
+    "room_id"                        integer NOT NULL
+   ,"survey_id"                      integer NOT NULL
+   ,"dictionary_id"                  integer NULL
+   ,"page_size"                      integer NOT NULL
+   ,"page"                           long binary NOT NULL
+   ,"archived"                       timestamp NOT NULL DEFAULT current timestamp
+   ,PRIMARY KEY ("room_id" ASC,"survey_id" ASC) 
+)
+go
+
+COMMENT ON TABLE "DBA"."room_page_archive" IS 
+	'Room pages as downloaded, zlib-compressed with the page_archive_dictionary dictionary_id (none if null), for parsing again with --reparse.'
+go
+
+CREATE TABLE "DBA"."search_page_archive" (
+    "survey_id"                      integer NOT NULL
+   ,"room_type"                      varchar(255) NOT NULL
+   ,"neighborhood_id"                integer NOT NULL
+   ,"guests"                         integer NOT NULL
+   ,"page_number"                    integer NOT NULL
+   ,"dictionary_id"                  integer NULL
+   ,"page_size"                      integer NOT NULL
+   ,"page"                           long binary NOT NULL
+   ,"archived"                       timestamp NOT NULL DEFAULT current timestamp
+   ,PRIMARY KEY ("survey_id" ASC,"room_type" ASC,"neighborhood_id" ASC,"guests" ASC,"page_number" ASC) 
+)
+go
+
+COMMENT ON TABLE "DBA"."search_page_archive" IS 
+	'Search pages as downloaded, keyed like survey_search_page and compressed like room_page_archive.'
+go
+
+CREATE TABLE "DBA"."search_area_bounding_box" (
+    "search_area_id"                 integer NOT NULL
+   ,"n_lat"                          double NOT NULL
+   ,"e_lng"                          double NOT NULL
+   ,"s_lat"                          double NOT NULL
+   ,"w_lng"                          double NOT NULL
+   ,PRIMARY KEY ("search_area_id" ASC) 
+)
+go
+
+COMMENT ON TABLE "DBA"."search_area_bounding_box" IS 
+	'The bounding box of a search area with no neighborhoods, which is searched by cells of the box instead.'
+go
+
+CREATE TABLE "DBA"."survey_search_cell" (
+    "survey_id"                      integer NOT NULL
+   ,"room_type"                      varchar(255) NOT NULL
+   ,"cell"                           varchar(64) NOT NULL
+   ,"room_count"                     integer NOT NULL
+   ,"split"                          bit NOT NULL
+   ,PRIMARY KEY ("survey_id" ASC,"room_type" ASC,"cell" ASC) 
+)
+go
+
+COMMENT ON TABLE "DBA"."survey_search_cell" IS 
+	'Bounding box cells searched, like survey_search_page for neighborhoods. cell is the path of quadrants (0 NW, 1 NE, 2 SW, 3 SE) from the bounding box, and split is set if the cell was full and its quadrants were searched.'
+go
+
 CREATE TABLE "DBA"."organization" (
     "id"                             integer NOT NULL
    ,"company"                        varchar(255) NULL
@@ -49771,6 +49859,18 @@ CREATE INDEX "idx_location" ON "DBA"."room"
     ( "location" )
 go
 
+CREATE INDEX "idx_room_survey_host" ON "DBA"."room"
+    ( "survey_id" ASC,"host_id" ASC,"deleted" ASC,"price" ASC )
+go
+
+CREATE INDEX "idx_room_host" ON "DBA"."room"
+    ( "host_id" ASC,"price" ASC )
+go
+
+CREATE INDEX "idx_room_unfilled" ON "DBA"."room"
+    ( "price" ASC,"deleted" ASC )
+go
+
 call sa_unload_display_table_status( 17738, 2, 10, 'DBA', 'search_area' )
 go
 
@@ -49780,12 +49880,20 @@ go
 call sa_unload_display_table_status( 17738, 4, 10, 'DBA', 'neighborhood' )
 go
 
+CREATE INDEX "idx_neighborhood_name" ON "DBA"."neighborhood"
+    ( "name" ASC )
+go
+
 call sa_unload_display_table_status( 17738, 5, 10, 'DBA', 'survey' )
 go
 
 call sa_unload_display_table_status( 17738, 6, 10, 'DBA', 'survey_search_page' )
 go
 
+CREATE INDEX "idx_fill_queue_status" ON "DBA"."room_fill_queue"
+    ( "status" ASC,"lease_expires" ASC )
+go
+
 call sa_unload_display_table_status( 17738, 7, 10, 'DBA', 'organization' )
 go
 
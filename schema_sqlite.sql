@@ -0,0 +1,149 @@
+-- Tables for the sqlite database backend (airbnb.py -db sqlite), matching
+-- those of reload.sql. The database is created from this file the first
+-- time airbnb.py connects to it, or by airbnb.py -db sqlite -dbi. Later
+-- changes, such as indexes, are applied by the migrations in airbnb.py.
+
+create table if not exists room (
+    room_id integer not null,
+    host_id integer null,
+    room_type varchar(255) null,
+    country varchar(255) null,
+    city varchar(255) null,
+    neighborhood varchar(255) null,
+    address varchar(1023) null,
+    reviews integer null,
+    overall_satisfaction float null,
+    accommodates integer null,
+    bedrooms decimal(5,2) null,
+    bathrooms decimal(5,2) null,
+    price float null,
+    deleted integer null,
+    minstay integer null,
+    last_modified timestamp null default current_timestamp,
+    latitude numeric(30,6) null,
+    longitude numeric(30,6) null,
+    survey_id integer not null default 999999,
+    page text null,
+    primary key (room_id, survey_id)
+);
+
+create table if not exists search_area (
+    search_area_id integer primary key autoincrement,
+    name varchar(255) null default 'UNKNOWN'
+);
+
+create table if not exists city (
+    city_id integer primary key autoincrement,
+    name varchar(255) null,
+    search_area_id integer null
+);
+
+create table if not exists neighborhood (
+    neighborhood_id integer primary key autoincrement,
+    name varchar(255) null,
+    search_area_id integer null
+);
+
+-- Each collection of rooms for a given city (search area) over a short
+-- period of time (usually a day) is called a survey.
+create table if not exists survey (
+    survey_id integer primary key autoincrement,
+    survey_date date null default current_date,
+    survey_description varchar(255) null,
+    search_area_id integer null
+);
+
+-- Search progress during the first stage of a survey.
+create table if not exists survey_search_page (
+    survey_id integer not null,
+    room_type varchar(255) not null,
+    neighborhood_id integer not null,
+    page_number integer not null,
+    guests integer not null,
+    has_rooms bit null,
+    primary key (survey_id, room_type, neighborhood_id, page_number, guests)
+);
+
+-- Rooms waiting to be filled by the second stage of a survey.
+create table if not exists room_fill_queue (
+    room_id integer not null,
+    survey_id integer not null,
+    status integer not null default 0,
+    lease_owner varchar(255) null,
+    lease_expires timestamp null,
+    primary key (room_id, survey_id)
+);
+
+create index if not exists idx_fill_queue_status
+on room_fill_queue (status, lease_expires);
+
+create table if not exists page_archive_dictionary (
+    dictionary_id integer primary key autoincrement,
+    page_type varchar(20) not null,
+    zdict blob not null,
+    created timestamp not null default current_timestamp
+);
+
+create table if not exists room_page_archive (
+    room_id integer not null,
+    survey_id integer not null,
+    dictionary_id integer null,
+    page_size integer not null,
+    page blob not null,
+    archived timestamp not null default current_timestamp,
+    primary key (room_id, survey_id)
+);
+
+create table if not exists search_page_archive (
+    survey_id integer not null,
+    room_type varchar(255) not null,
+    neighborhood_id integer not null,
+    guests integer not null,
+    page_number integer not null,
+    dictionary_id integer null,
+    page_size integer not null,
+    page blob not null,
+    archived timestamp not null default current_timestamp,
+    primary key (survey_id, room_type, neighborhood_id, guests, page_number)
+);
+
+create table if not exists search_area_bounding_box (
+    search_area_id integer not null,
+    n_lat double not null,
+    e_lng double not null,
+    s_lat double not null,
+    w_lng double not null,
+    primary key (search_area_id)
+);
+
+create table if not exists survey_search_cell (
+    survey_id integer not null,
+    room_type varchar(255) not null,
+    cell varchar(64) not null,
+    room_count integer not null,
+    split bit not null,
+    primary key (survey_id, room_type, cell)
+);
+
+-- The survey_room(@survey_id) and survey_host(@survey_id) procedures of
+-- reload.sql, as views over all surveys: select from them "where
+-- survey_id = ?".
+create view if not exists survey_room as
+select room_id, host_id, room_type,
+    country, city, neighborhood, address, reviews,
+    overall_satisfaction, accommodates, bedrooms,
+    bathrooms, price, deleted, minstay, last_modified,
+    latitude, longitude, survey_id
+from room
+where price is not null
+and deleted = 0;
+
+create view if not exists survey_host as
+select survey_id, host_id, count(*) rooms,
+    case when count(*) > 1 then 1 else 0 end multilister,
+    sum(reviews) revs,
+    count(distinct address) addresses,
+    sum(reviews * price) income1,
+    sum(reviews * price * minstay) income2
+from survey_room
+group by survey_id, host_id;
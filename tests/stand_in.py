@@ -0,0 +1,231 @@
+"""
+A local stand-in for the Airbnb web site, and a scratch SQLite database,
+so that the fill and search can be tested without the network or SQL
+Anywhere.
+"""
+import os
+import sys
+import re
+import shutil
+import tempfile
+import threading
+import time
+import http.server
+import urllib.parse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))))
+import airbnb
+
+ROOM_PAGE = """<html><head><title>Room {room_id}</title>
+<meta property="airbedandbreakfast:country" content="Canada">
+<meta property="airbedandbreakfast:city" content="Toronto">
+<meta property="airbedandbreakfast:rating" content="4.5">
+<meta property="airbedandbreakfast:location:latitude" content="43.65">
+<meta property="airbedandbreakfast:location:longitude" content="-79.38">
+</head><body>
+<div id="room"><div id="summary"><div class="panel-body">
+<i class="icon icon-private-room x"></i></div></div>
+<div id="host-profile"><a href="/users/show/{host_id}">Host</a></div>
+<div id="details-column"><div class="row"><div class="col-md-6">
+<div>Accommodates: <strong>2</strong></div>
+<div>Bedrooms: <strong>1</strong></div>
+<div>Bathrooms: <strong>1</strong></div></div>
+<div>Minimum Stay: <strong>{minstay} nights</strong></div></div></div>
+<div class="rich-toggle wish"
+ data-address="1 Queen St W, Toronto (The Annex), ON"></div>
+<div id="reviews"><h4> {reviews} Reviews</h4></div></div>
+<div id="price_amount">${price}</div>
+<div id="per_night" class="show"></div>
+</body></html>"""
+
+DELETED_PAGE = """<html><head><title>Not found</title></head>
+<body><p>This listing is no longer available.</p></body></html>"""
+
+
+class StandIn():
+    """
+    Serves room pages, search pages and the search area page of a
+    made-up city from a local HTTP server, and records every request.
+
+    rooms maps room_id to (neighborhood, room_type), or to None for a
+    deleted room. Search pages list rooms_per_page rooms of a
+    neighborhood and room type, the same for any number of guests up to
+    max_guests and none above it.
+    """
+    def __init__(self, rooms, neighborhoods, rooms_per_page=5,
+                 max_guests=2, latency=0.02):
+        self.rooms = rooms
+        self.neighborhoods = neighborhoods
+        self.rooms_per_page = rooms_per_page
+        self.max_guests = max_guests
+        self.latency = latency
+        # (time, path) of each request
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self._server = None
+
+    def room_values(self, room_id):
+        return {"room_id": room_id, "host_id": 1000 + room_id,
+                "minstay": room_id % 4 + 1, "reviews": room_id * 3,
+                "price": 100 + room_id}
+
+    def search_rooms(self, neighborhood, room_type, guests, page_number):
+        if guests > self.max_guests:
+            return []
+        room_ids = sorted(
+            room_id for (room_id, room) in self.rooms.items()
+            if room is not None and room == (neighborhood, room_type))
+        start = (page_number - 1) * self.rooms_per_page
+        return room_ids[start:start + self.rooms_per_page]
+
+    def page(self, path):
+        match = re.match(r"/rooms/(\d+)", path)
+        if match:
+            room_id = int(match.group(1))
+            if self.rooms.get(room_id) is None:
+                return DELETED_PAGE
+            return ROOM_PAGE.format(**self.room_values(room_id))
+        query = urllib.parse.parse_qs(urllib.parse.urlparse(path).query)
+        if "page" not in query:
+            return ("<html><body>"
+                    "<input name='location' value='Toronto'/>"
+                    + "".join("<input name='neighborhood' value='"
+                              + neighborhood + "'/>"
+                              for neighborhood in self.neighborhoods)
+                    + "</body></html>")
+        room_ids = self.search_rooms(
+            query.get("neighborhoods[]", [None])[0],
+            query["room_types[]"][0], int(query["guests"][0]),
+            int(query["page"][0]))
+        return ("<html><body>"
+                + "".join("<div class='listing' data-id='" + str(room_id)
+                          + "'></div>" for room_id in room_ids)
+                + "</body></html>")
+
+    def start(self):
+        stand_in = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                with stand_in._lock:
+                    stand_in.requests.append((time.time(), self.path))
+                    stand_in.in_flight += 1
+                    stand_in.max_in_flight = max(stand_in.max_in_flight,
+                                                 stand_in.in_flight)
+                try:
+                    time.sleep(stand_in.latency)
+                    body = stand_in.page(self.path).encode("utf-8")
+                finally:
+                    with stand_in._lock:
+                        stand_in.in_flight -= 1
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self._server = http.server.ThreadingHTTPServer(("127.0.0.1", 0),
+                                                       Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever,
+                         daemon=True).start()
+        root = "http://127.0.0.1:" + str(self._server.server_address[1])
+        airbnb.URL_ROOM_ROOT = root + "/rooms/"
+        airbnb.URL_SEARCH_ROOT = root + "/s/"
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def paths(self, prefix):
+        with self._lock:
+            return [path for (t, path) in self.requests
+                    if path.startswith(prefix)]
+
+    def max_requests_within(self, seconds):
+        """The most requests started within any window of seconds."""
+        with self._lock:
+            times = sorted(t for (t, path) in self.requests)
+        most = 0
+        first = 0
+        for (last, t) in enumerate(times):
+            while t - times[first] > seconds:
+                first += 1
+            most = max(most, last - first + 1)
+        return most
+
+
+class ScratchDatabase():
+    """
+    Point airbnb.py at a new SQLite database in a temporary directory,
+    and clear the state it keeps between commands.
+    """
+    def __init__(self):
+        self.directory = tempfile.mkdtemp()
+        self.database_file = os.path.join(self.directory, "test.sqlite")
+        self._saved = (airbnb.DB_SQLITE_FILE, airbnb.DB_BACKEND,
+                       airbnb.URL_ROOM_ROOT, airbnb.URL_SEARCH_ROOT)
+
+    def open(self):
+        airbnb.DB_SQLITE_FILE = self.database_file
+        airbnb.set_db_backend("sqlite")
+        reset_state()
+        return self
+
+    def query(self, sql, params=()):
+        conn = airbnb.connect()
+        cur = conn.cursor()
+        try:
+            cur.execute(sql, params)
+            return cur.fetchall()
+        finally:
+            cur.close()
+
+    def execute(self, sql, params=()):
+        conn = airbnb.connect()
+        cur = conn.cursor()
+        try:
+            cur.execute(sql, params)
+            conn.commit()
+        finally:
+            cur.close()
+
+    def close(self):
+        reset_state()
+        airbnb.disconnect()
+        if airbnb._db_pool is not None:
+            airbnb._db_pool.close()
+            airbnb._db_pool = None
+        # the saved backend is chosen again when it is next used
+        airbnb._db_backend = None
+        (airbnb.DB_SQLITE_FILE, airbnb.DB_BACKEND, airbnb.URL_ROOM_ROOT,
+         airbnb.URL_SEARCH_ROOT) = self._saved
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+def reset_state():
+    """Forget what an earlier command left in memory, as a new run would."""
+    airbnb._fill_queue = None
+    airbnb._search_progress = None
+    airbnb._seen_rooms = None
+    airbnb._checked_surveys.clear()
+    airbnb._reopened_surveys.clear()
+    with airbnb._survey_metadata_lock:
+        airbnb._survey_metadata.clear()
+
+
+def set_request_rate(rate):
+    """Hold the shared rate limiter at rate requests per second."""
+    limiter = airbnb.configure_rate_limiter("default", rate)
+    limiter.rate = rate
+    limiter.min_rate = rate
+    return limiter
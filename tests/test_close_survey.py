@@ -0,0 +1,61 @@
+"""
+Closing a survey (-cs), on a scratch SQLite database.
+"""
+import unittest
+
+from stand_in import ScratchDatabase
+import airbnb
+
+SURVEY_ID = 1
+
+
+class CloseSurveyTest(unittest.TestCase):
+    def setUp(self):
+        self.database = ScratchDatabase().open()
+        for room_id in range(1, 31):
+            self.database.execute("""
+                insert into room (room_id, survey_id, host_id, room_type,
+                address, reviews, price, minstay, deleted)
+                values (?, ?, ?, ?, ?, ?, ?, ?, 0)""", (
+                room_id, SURVEY_ID,
+                # some rooms with no host or room type
+                None if room_id % 7 == 0 else room_id % 4,
+                None if room_id % 5 == 0
+                else airbnb.SEARCH_ROOM_TYPES[room_id % 3],
+                "Address " + str(room_id % 6), room_id, 50 + room_id,
+                room_id % 3 + 1))
+
+    def tearDown(self):
+        self.database.close()
+
+    def test_host_summary_matches_survey_host(self):
+        airbnb.close_survey(SURVEY_ID)
+        columns = """host_id, rooms, multilister, revs, addresses,
+            income1, income2"""
+        self.assertEqual(
+            sorted(self.database.query(
+                "select " + columns + " from survey_host_summary"
+                + " where survey_id = ?", (SURVEY_ID,)), key=repr),
+            sorted(self.database.query(
+                "select " + columns + " from survey_host"
+                + " where survey_id = ?", (SURVEY_ID,)), key=repr))
+
+    def test_room_type_summary_matches_survey_room(self):
+        airbnb.close_survey(SURVEY_ID)
+        self.assertEqual(
+            sorted(self.database.query("""
+                select room_type, listings, hosts, bookings, income1,
+                income2
+                from survey_room_type_summary
+                where survey_id = ?""", (SURVEY_ID,)), key=repr),
+            sorted(self.database.query("""
+                select room_type, count(*), count(distinct host_id),
+                sum(reviews), sum(reviews * price),
+                sum(reviews * price * minstay)
+                from survey_room
+                where survey_id = ?
+                group by room_type""", (SURVEY_ID,)), key=repr))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+"""
+The write-behind database writer (-s and -f without -c), on a scratch
+SQLite database.
+"""
+import logging
+import unittest
+
+from stand_in import ScratchDatabase
+import airbnb
+
+SURVEY_ID = 1
+ROOMS_PER_PAGE = 18
+
+
+def room_info(room_id):
+    return (room_id, 1000 + room_id, "Private room", None, None, None,
+            None, 3, None, None, None, None, 100, 0, None, 43.6, -79.4,
+            SURVEY_ID)
+
+
+def search_page(page_number):
+    first = page_number * ROOMS_PER_PAGE
+    return ([room_info(room_id)
+             for room_id in range(first, first + ROOMS_PER_PAGE)],
+            (SURVEY_ID, "Private room", 1, 1, page_number, 1))
+
+
+class DbWriterTest(unittest.TestCase):
+    def setUp(self):
+        self.database = ScratchDatabase().open()
+        self.database.execute("""
+            insert into neighborhood (neighborhood_id, name)
+            values (1, 'A')""")
+        # flushed only by the tests, or once DB_WRITER_BATCH_SIZE rows
+        # are waiting
+        self.writer = airbnb.enable_db_writer(flush_seconds=3600)
+
+    def tearDown(self):
+        airbnb.close_db_writer()
+        self.database.close()
+
+    def room_count(self):
+        return self.database.query("select count(*) from room")[0][0]
+
+    def test_batches_are_bounded_by_rows(self):
+        pages = [search_page(page_number) for page_number in range(1, 201)]
+        batches = list(self.writer._batches(
+            [("search_pages", page) for page in pages]))
+        self.assertEqual(sum(len(batch) for batch in batches), len(pages))
+        for batch in batches:
+            self.assertLessEqual(
+                sum(airbnb._record_rows(kind, record)
+                    for (kind, record) in batch),
+                self.writer.batch_size)
+
+    def test_saves_many_search_pages_in_multi_row_batches(self):
+        with self.assertLogs(airbnb.logger, logging.INFO) as logs:
+            airbnb.db_save_search_pages(
+                [search_page(page_number) for page_number in range(1, 201)])
+            airbnb.close_db_writer()
+        self.assertEqual(self.room_count(), 200 * ROOMS_PER_PAGE)
+        self.assertFalse(any("one at a time" in line for line in logs.output))
+
+    def test_a_failed_flush_does_not_stop_the_writer(self):
+        saved = airbnb.db_save_rooms_as_deleted
+
+        def fail(rooms):
+            raise RuntimeError("disk full")
+
+        airbnb.db_save_rooms_as_deleted = fail
+        try:
+            airbnb.db_save_room_as_deleted(1, SURVEY_ID)
+            with self.assertLogs(airbnb.logger, logging.ERROR):
+                self.writer.flush_seconds = 0.01
+                with self.writer._condition:
+                    self.writer._condition.notify()
+                self.writer._thread.join(0.5)
+        finally:
+            airbnb.db_save_rooms_as_deleted = saved
+        self.assertTrue(self.writer._thread.is_alive())
+        self.assertEqual(self.writer.stats()["records_lost"], 1)
+        airbnb.db_save_search_pages([search_page(1)])
+        airbnb.close_db_writer()
+        self.assertEqual(self.room_count(), ROOMS_PER_PAGE)
+
+    def test_logs_a_search_cell_only_with_the_rooms_on_its_pages(self):
+        saved = airbnb.db_save_search_pages
+        saved([search_page(1)])
+        airbnb.db_log_search_cells([(SURVEY_ID, "Private room", "",
+                                     ROOMS_PER_PAGE, 0)])
+
+        def fail(pages):
+            raise RuntimeError("disk full")
+
+        airbnb.db_save_search_pages = fail
+        try:
+            with self.assertRaises(RuntimeError):
+                self.writer.flush()
+        finally:
+            airbnb.db_save_search_pages = saved
+        self.assertEqual(self.room_count(), 0)
+        self.assertEqual(
+            self.database.query("select count(*) from survey_search_cell"),
+            [(0,)])
+
+    def test_saves_records_itself_once_the_writer_thread_has_died(self):
+        writer = self.writer
+        with writer._condition:
+            writer._stopped = True
+            writer._condition.notify()
+        writer._thread.join()
+        airbnb.db_save_search_pages([search_page(1)])
+        self.assertEqual(self.room_count(), ROOMS_PER_PAGE)
+        self.assertEqual(writer.stats()["records"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,173 @@
+"""
+The concurrent fill (-f -c N), against a local stand-in for the web site.
+"""
+import logging
+import time
+import unittest
+
+from stand_in import StandIn, ScratchDatabase, set_request_rate
+import airbnb
+
+SURVEY_ID = 1
+ROOM_COUNT = 24
+DELETED_ROOM_ID = ROOM_COUNT + 1
+REQUESTS_PER_SECOND = 40.0
+
+
+class ConcurrentFillTest(unittest.TestCase):
+    def setUp(self):
+        self.database = ScratchDatabase().open()
+        rooms = dict((room_id, ("A", "Private room"))
+                     for room_id in range(1, ROOM_COUNT + 1))
+        rooms[DELETED_ROOM_ID] = None
+        self.site = StandIn(rooms, ["A"], latency=0.1).start()
+        for room_id in rooms:
+            self.database.execute("""
+                insert into room (room_id, survey_id, deleted)
+                values (?, ?, 0)""", (room_id, SURVEY_ID))
+        set_request_rate(REQUESTS_PER_SECOND)
+
+    def tearDown(self):
+        self.site.stop()
+        self.database.close()
+
+    def fill(self, fetchers):
+        start_time = time.time()
+        with self.assertLogs(airbnb.logger, logging.INFO) as logs:
+            airbnb.fill_loop_by_room_pipelined(fetchers, 1)
+        return (time.time() - start_time, logs.output)
+
+    def test_fills_every_room_once(self):
+        (elapsed, logs) = self.fill(4)
+        self.assertEqual(len(self.site.paths("/rooms/")), ROOM_COUNT + 1)
+        for room_id in range(1, ROOM_COUNT + 1):
+            expected = self.site.room_values(room_id)
+            self.assertEqual(
+                self.database.query("""
+                    select host_id, minstay, reviews, price, deleted
+                    from room
+                    where room_id = ? and survey_id = ?""",
+                                    (room_id, SURVEY_ID)),
+                [(expected["host_id"], expected["minstay"],
+                  expected["reviews"], expected["price"], 0)])
+        self.assertEqual(
+            self.database.query("""
+                select status, count(*)
+                from room_fill_queue
+                group by status"""),
+            [(airbnb.FILL_STATUS_DONE, ROOM_COUNT + 1)])
+        # the rooms/sec report
+        self.assertTrue(any("stored " + str(ROOM_COUNT + 1) in line
+                            for line in logs))
+
+    def test_marks_deleted_rooms(self):
+        self.fill(4)
+        self.assertEqual(
+            self.database.query("""
+                select deleted
+                from room
+                where room_id = ?""", (DELETED_ROOM_ID,)),
+            [(1,)])
+
+    def test_keeps_several_fetches_in_flight(self):
+        (elapsed, logs) = self.fill(4)
+        self.assertGreater(self.site.max_in_flight, 1)
+
+    def test_fetchers_leave_parsing_to_the_parser_processes(self):
+        saved = airbnb.RoomPageStream
+        airbnb.RoomPageStream = None
+        try:
+            self.fill(4)
+        finally:
+            airbnb.RoomPageStream = saved
+        self.assertEqual(len(self.site.paths("/rooms/")), ROOM_COUNT + 1)
+        self.assertEqual(
+            self.database.query("""
+                select count(*)
+                from room
+                where price is not null"""),
+            [(ROOM_COUNT,)])
+
+    def test_keeps_to_the_request_budget(self):
+        (elapsed, logs) = self.fill(8)
+        requests = len(self.site.requests)
+        self.assertGreaterEqual(elapsed,
+                                0.9 * (requests - 1) / REQUESTS_PER_SECOND)
+        # one token of burst, and some scheduling slack
+        self.assertLessEqual(self.site.max_requests_within(0.5),
+                             0.5 * REQUESTS_PER_SECOND + 3)
+
+    def save_cards(self):
+        """Give rooms 1 to 12 their listing card data, as the search does."""
+        self.database.execute("""
+            update room
+            set host_id = 1, room_type = 'Private room', reviews = 0,
+            price = 50, latitude = 43.6, longitude = -79.4
+            where room_id <= 12""")
+        airbnb.db_queue_rooms_to_fill([(room_id, SURVEY_ID)
+                                       for room_id in range(1, 13)])
+
+    def test_fetches_rooms_complete_from_their_cards(self):
+        self.save_cards()
+        self.fill(4)
+        self.assertEqual(len(self.site.paths("/rooms/")), ROOM_COUNT + 1)
+        self.assertEqual(
+            self.database.query("""
+                select count(*)
+                from room
+                where minstay is null"""),
+            [(1,)])
+
+    def test_cards_option_skips_rooms_complete_from_their_cards(self):
+        self.save_cards()
+        airbnb.FILL_FROM_CARDS = True
+        try:
+            self.fill(4)
+        finally:
+            airbnb.FILL_FROM_CARDS = False
+        self.assertEqual(len(self.site.paths("/rooms/")), ROOM_COUNT - 11)
+        # left for a fill without -cards
+        self.assertEqual(
+            self.database.query("""
+                select count(*)
+                from room_fill_queue
+                where status = ?""", (airbnb.FILL_STATUS_QUEUED,)),
+            [(12,)])
+
+    def test_does_not_fetch_rooms_filled_in_earlier_surveys(self):
+        # filled rooms with values their pages did not give
+        for room_id in range(1, 6):
+            self.database.execute("""
+                insert into room (room_id, survey_id, host_id, price,
+                reviews, minstay, deleted)
+                values (?, ?, 1, 50, null, null, 0)""",
+                                  (room_id, SURVEY_ID - 1))
+        self.fill(4)
+        self.assertEqual(len(self.site.paths("/rooms/")), ROOM_COUNT + 1)
+        self.assertEqual(
+            self.database.query("""
+                select count(*)
+                from room
+                where survey_id = ?
+                and host_id = 1
+                and reviews is null""", (SURVEY_ID - 1,)),
+            [(5,)])
+
+    def test_the_queue_seed_reads_the_fill_index(self):
+        plan = self.database.query("""
+            explain query plan
+            select room_id, survey_id
+            from room
+            where """ + airbnb.DB_FILL_SEED_WHERE)
+        self.assertIn("idx_room_fill_seed", plan[0][-1])
+
+    def test_a_second_run_fetches_nothing(self):
+        self.fill(4)
+        fetched = len(self.site.requests)
+        airbnb._fill_queue = None
+        self.fill(4)
+        self.assertEqual(len(self.site.requests), fetched)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+"""
+The keep-alive HTTP session pool behind a proxy, against a local stand-in
+for the web site and a local fake proxy.
+"""
+import os
+import threading
+import unittest
+import unittest.mock
+import http.server
+
+from stand_in import StandIn
+import airbnb
+
+
+class FakeProxy():
+    """
+    Answers plain HTTP requests itself, and refuses CONNECT tunnels;
+    records the request line and Proxy-Authorization header of each.
+    """
+    def __init__(self):
+        self.requests = []
+
+    def start(self):
+        proxy = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                proxy.requests.append(
+                    (self.command, self.path,
+                     self.headers.get("Proxy-Authorization")))
+                body = b"<html><body>from the proxy</body></html>"
+                self.send_response(200)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_CONNECT(self):
+                proxy.requests.append(
+                    (self.command, self.path,
+                     self.headers.get("Proxy-Authorization")))
+                self.send_response(403)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+        self._server = http.server.ThreadingHTTPServer(("127.0.0.1", 0),
+                                                       Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever,
+                         daemon=True).start()
+        self.address = "127.0.0.1:" + str(self._server.server_address[1])
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class HttpSessionPoolProxyTest(unittest.TestCase):
+    def setUp(self):
+        self.saved_roots = (airbnb.URL_ROOM_ROOT, airbnb.URL_SEARCH_ROOT)
+        self.proxy = FakeProxy().start()
+        self.site = StandIn({1: ("A", "Private room")}, ["A"]).start()
+        # restored after each test; the site's own address is bypassed
+        # only when a test says so
+        self.environment = unittest.mock.patch.dict(os.environ,
+                                                    {"no_proxy": ""})
+        self.environment.start()
+
+    def tearDown(self):
+        self.environment.stop()
+        self.site.stop()
+        self.proxy.stop()
+        (airbnb.URL_ROOM_ROOT, airbnb.URL_SEARCH_ROOT) = self.saved_roots
+
+    def test_sends_http_requests_through_the_proxy(self):
+        pool = airbnb.HttpSessionPool(proxies={
+            "http": "http://user:secret@" + self.proxy.address})
+        body = pool.get("http://www.example.com/rooms/1?x=1")
+        self.assertIn(b"from the proxy", body)
+        self.assertEqual(self.proxy.requests, [
+            ("GET", "http://www.example.com/rooms/1?x=1",
+             "Basic dXNlcjpzZWNyZXQ=")])
+        self.assertEqual(self.site.requests, [])
+
+    def test_tunnels_https_requests_through_the_proxy(self):
+        pool = airbnb.HttpSessionPool(proxies={
+            "https": self.proxy.address})
+        with self.assertRaises(OSError):
+            pool.get("https://www.example.com/rooms/1")
+        self.assertEqual(self.proxy.requests,
+                         [("CONNECT", "www.example.com:443", None)])
+
+    def test_bypasses_the_proxy_for_no_proxy_hosts(self):
+        os.environ["no_proxy"] = "127.0.0.1"
+        pool = airbnb.HttpSessionPool(proxies={
+            "http": "http://" + self.proxy.address})
+        body = pool.get(airbnb.URL_ROOM_ROOT + "1")
+        self.assertIn(b"Room 1", body)
+        self.assertEqual(self.proxy.requests, [])
+
+    def test_reads_the_proxy_from_the_environment(self):
+        os.environ["http_proxy"] = "http://" + self.proxy.address
+        pool = airbnb.HttpSessionPool()
+        pool.get("http://www.example.com/rooms/1")
+        self.assertEqual(len(self.proxy.requests), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,138 @@
+"""
+The parallel search (-s -c N), against a local stand-in for the web site.
+"""
+import collections
+import time
+import unittest
+import urllib.parse
+
+from stand_in import StandIn, ScratchDatabase, set_request_rate
+import airbnb
+
+SEARCH_AREA = "Toronto"
+ROOMS_PER_PAGE = 5
+REQUESTS_PER_SECOND = 40.0
+
+
+class ParallelSearchTest(unittest.TestCase):
+    def setUp(self):
+        self.database = ScratchDatabase().open()
+        self.rooms = {}
+        for room_id in range(1, 13):
+            self.rooms[room_id] = ("A", "Private room")
+        for room_id in range(13, 21):
+            self.rooms[room_id] = ("B", "Entire home/apt")
+        self.site = StandIn(self.rooms, ["A", "B"],
+                            rooms_per_page=ROOMS_PER_PAGE,
+                            latency=0.02).start()
+        self.saved_min_yield = airbnb.SEARCH_MIN_YIELD
+        # every slice is searched to its first empty page
+        airbnb.SEARCH_MIN_YIELD = 0
+        airbnb.ws_get_city_info(SEARCH_AREA, airbnb.FLAGS_ADD)
+        airbnb.db_add_survey(SEARCH_AREA)
+        (self.survey_id,) = self.database.query(
+            "select max(survey_id) from survey")[0]
+        set_request_rate(REQUESTS_PER_SECOND)
+
+    def tearDown(self):
+        airbnb.SEARCH_MIN_YIELD = self.saved_min_yield
+        self.site.stop()
+        self.database.close()
+
+    def search(self, fetchers=4):
+        start_time = time.time()
+        airbnb.search_survey_pipelined(self.survey_id, airbnb.FLAGS_ADD,
+                                       fetchers, 1)
+        return time.time() - start_time
+
+    def search_pages(self):
+        """The (room_type, neighborhood, guests) -> page numbers fetched."""
+        slices = collections.defaultdict(list)
+        for path in self.site.paths("/s/" + SEARCH_AREA + "?"):
+            query = urllib.parse.parse_qs(urllib.parse.urlparse(path).query)
+            slices[(query["room_types[]"][0],
+                    query["neighborhoods[]"][0],
+                    int(query["guests"][0]))].append(int(query["page"][0]))
+        return slices
+
+    def test_finds_every_room(self):
+        self.search()
+        self.assertEqual(
+            sorted(room_id for (room_id,) in self.database.query("""
+                select room_id
+                from room
+                where survey_id = ?""", (self.survey_id,))),
+            sorted(self.rooms))
+
+    def test_queues_the_rooms_found_to_be_filled(self):
+        self.search()
+        self.assertEqual(
+            sorted(room_id for (room_id,) in self.database.query("""
+                select room_id
+                from room_fill_queue
+                where survey_id = ?
+                and status = ?""", (self.survey_id,
+                                    airbnb.FILL_STATUS_QUEUED))),
+            sorted(self.rooms))
+
+    def test_searches_every_partition(self):
+        self.search()
+        partitions = set((room_type, neighborhood)
+                         for (room_type, neighborhood, guests)
+                         in self.search_pages())
+        self.assertEqual(partitions,
+                         set((room_type, neighborhood)
+                             for room_type in airbnb.SEARCH_ROOM_TYPES
+                             for neighborhood in ("A", "B")))
+
+    def test_each_slice_stops_at_its_first_empty_page(self):
+        self.search()
+        for ((room_type, neighborhood, guests), pages) \
+                in self.search_pages().items():
+            rooms = 0
+            if guests <= self.site.max_guests:
+                rooms = list(self.rooms.values()).count(
+                    (neighborhood, room_type))
+            full_pages = (rooms + ROOMS_PER_PAGE - 1) // ROOMS_PER_PAGE
+            self.assertEqual(sorted(pages),
+                             list(range(1, full_pages + 2)))
+
+    def test_keeps_to_the_request_budget(self):
+        elapsed = self.search(8)
+        requests = len(self.site.requests)
+        self.assertGreaterEqual(elapsed,
+                                0.9 * (requests - 1) / REQUESTS_PER_SECOND)
+        # one token of burst, and some scheduling slack
+        self.assertLessEqual(self.site.max_requests_within(0.5),
+                             0.5 * REQUESTS_PER_SECOND + 3)
+
+    def test_a_second_run_fetches_nothing(self):
+        self.search()
+        fetched = len(self.site.requests)
+        self.search()
+        self.assertEqual(len(self.site.requests), fetched)
+
+    def test_resumes_where_the_log_stops(self):
+        self.search()
+        fetched = len(self.site.paths("/s/"))
+        self.database.execute("""
+            delete from survey_search_page
+            where survey_id = ?
+            and neighborhood_id = (
+                select neighborhood_id
+                from neighborhood
+                where name = 'B')""", (self.survey_id,))
+        before = set(self.search_pages())
+        self.site.requests = []
+        self.search()
+        again = self.search_pages()
+        self.assertEqual(set(neighborhood for (room_type, neighborhood,
+                                               guests) in again),
+                         set(["B"]))
+        self.assertEqual(set(again),
+                         set(key for key in before if key[1] == "B"))
+        self.assertLess(len(self.site.paths("/s/")), fetched)
+
+
+if __name__ == "__main__":
+    unittest.main()